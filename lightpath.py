@@ -16,15 +16,33 @@ ping test on mininet: h1 ping h3
 import requests
 import json
 import argparse
+import atexit
+import hashlib
+import os
+from array import array
 from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 
 HEADERS = {'Content-Type': 'application/json'}
+MAX_PUSH_WORKERS = 16  # upper bound on concurrent staticflowpusher POSTs
+PATH_CACHE_DIR = os.path.expanduser('~/.cache/lightpath')
 
+# (src_sw, dst_sw) -> switch path, or None when unreachable; loaded per topology signature
+PATH_CACHE = {}
 
-def get_devices(floodlight_url):
+
+def make_session():
+    """Return a Session whose keep-alive pool can serve every concurrent flow push."""
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=MAX_PUSH_WORKERS))
+    return session
+
+
+def get_devices(floodlight_url, session=None):
     """Return list of device objects from Floodlight device API."""
     url = floodlight_url.rstrip('/') + '/wm/device/'
-    r = requests.get(url)
+    r = (session or requests).get(url)
     r.raise_for_status()
     data = r.json()
     # Normalize to list of dicts
@@ -47,22 +65,22 @@ def get_devices(floodlight_url):
         raise ValueError("Unexpected device API format: {}".format(type(data)))
 
 
-def get_switches(floodlight_url):
+def get_switches(floodlight_url, session=None):
     """Return list of switches (DPIDs) from Floodlight core API."""
     url = floodlight_url.rstrip('/') + '/wm/core/controller/switches/json'
-    r = requests.get(url)
+    r = (session or requests).get(url)
     r.raise_for_status()
     return r.json()
 
 
-def get_topology_links(floodlight_url):
+def get_topology_links(floodlight_url, session=None):
     """
     Return normalized topology links list. Will try several possible JSON field names that
     Floodlight or different versions may use.
     Each returned link will be a dict with keys: src, src_port, dst, dst_port (or skipped).
     """
     url = floodlight_url.rstrip('/') + '/wm/topology/links/json'
-    r = requests.get(url)
+    r = (session or requests).get(url)
     r.raise_for_status()
     raw = r.json()
 
@@ -134,51 +152,72 @@ def get_topology_links(floodlight_url):
     return normalized
 
 
-def find_device_by_name(devices, hostname):
+def index_devices(devices):
     """
-    Attempt to locate a device object from Floodlight's devices list that matches a
-    mininet host name (h1 -> .1 IPv4). Return the device dict or None.
+    Index Floodlight device objects once for find_device_by_name lookups:
+      ip_idx[last IPv4 octet string] -> (position, device)
+      mac_idx[last two MAC characters] -> (position, device)
+    Only the first device (in API order) is kept per key.
     """
-    # heuristic number from hostname (h1 -> 1)
-    try:
-        host_num = int(hostname.lstrip('h'))
-    except Exception:
-        host_num = None
-
-    for dev in devices:
+    ip_idx = {}
+    mac_idx = {}
+    for pos, dev in enumerate(devices):
         if not isinstance(dev, dict):
             continue
-        # check ipv4 as list or string
+        # ipv4 may be a list or a string
         ipv4s = dev.get('ipv4') or dev.get('ipv4Address') or dev.get('ip') or dev.get('ipv4Addresses')
         if isinstance(ipv4s, str):
             ipv4s = [ipv4s]
-        if isinstance(ipv4s, list) and host_num is not None:
+        if isinstance(ipv4s, list):
             for ip in ipv4s:
                 try:
-                    if ip.strip().endswith('.{}'.format(host_num)):
-                        return dev
+                    head, sep, octet = ip.strip().rpartition('.')
                 except Exception:
-                    pass
+                    continue
+                if sep:
+                    ip_idx.setdefault(octet, (pos, dev))
 
-        # check MAC: sometimes mininet uses 00:00:00:00:00:0N or similar; not very reliable
         macs = dev.get('mac') or dev.get('macAddress') or dev.get('macs')
         if isinstance(macs, str):
             macs = [macs]
-        if isinstance(macs, list) and host_num is not None:
+        if isinstance(macs, list):
             for m in macs:
-                if m.strip().endswith('{:02x}'.format(host_num)):
-                    return dev
+                if isinstance(m, str):
+                    mac_idx.setdefault(m.strip()[-2:], (pos, dev))
 
-    return None
+    return ip_idx, mac_idx
+
+
+def find_device_by_name(device_index, hostname):
+    """
+    Attempt to locate a device object from an index_devices() result that matches a
+    mininet host name (h1 -> .1 IPv4). Return the device dict or None.
+    """
+    # heuristic number from hostname (h1 -> 1)
+    try:
+        host_num = int(hostname.lstrip('h'))
+    except Exception:
+        return None
+
+    ip_idx, mac_idx = device_index
+    # MAC match is not very reliable (mininet uses 00:00:00:00:00:0N or similar), so it only
+    # wins over an IPv4 match when it belongs to a device listed earlier by Floodlight
+    matches = [m for m in (ip_idx.get(str(host_num)), mac_idx.get('{:02x}'.format(host_num))) if m]
+    if not matches:
+        return None
+    return min(matches, key=lambda m: m[0])[1]
 
 
 def build_switch_graph(links):
     """
     Build adjacency mapping:
       graph[sw_dpid] = list of (neighbor_dpid, src_port_on_this_switch, dst_port_on_neighbor)
+      port_of[(sw_dpid, neighbor_dpid)] = port on sw_dpid facing neighbor_dpid
     Only well-formed links are included. DPIDs are kept as strings exactly as returned.
+    Returns (graph, port_of).
     """
     graph = defaultdict(list)
+    port_of = {}
     for link in links:
         src = link.get('src')
         dst = link.get('dst')
@@ -191,30 +230,107 @@ def build_switch_graph(links):
         # If ports are None, leave them as None, but still add the neighbor relationship
         graph[src].append((dst, src_port, dst_port))
         graph[dst].append((src, dst_port, src_port))
-    return graph
+        # keep the first port seen per neighbor pair, as the adjacency scan used to
+        port_of.setdefault((src, dst), src_port)
+        port_of.setdefault((dst, src), dst_port)
+    return graph, port_of
 
 
-def shortest_switch_path(graph, src_sw, dst_sw):
-    """BFS shortest path returning list of switches (dpid strings)."""
+def build_csr(graph):
+    """
+    Flatten the adjacency mapping into CSR form for BFS:
+      ids[dpid] -> int node id, dpids[node id] -> dpid
+      neighbors[offsets[u]:offsets[u + 1]] = node ids adjacent to u, in adjacency-list order
+    Returns (ids, dpids, offsets, neighbors); offsets and neighbors are flat int arrays.
+    """
+    dpids = list(graph.keys())
+    ids = {dpid: i for i, dpid in enumerate(dpids)}
+    offsets = array('i', [0])
+    neighbors = array('i')
+    for dpid in dpids:
+        neighbors.extend(ids[nbr] for nbr, _, _ in graph[dpid])
+        offsets.append(len(neighbors))
+    return ids, dpids, offsets, neighbors
+
+
+def shortest_switch_path(csr, src_sw, dst_sw):
+    """BFS shortest path over a build_csr() adjacency, returning list of switches (dpid strings)."""
     if src_sw == dst_sw:
         return [src_sw]
-    q = deque([[src_sw]])
-    visited = {src_sw}
+    ids, dpids, offsets, neighbors = csr
+    src = ids.get(src_sw)
+    dst = ids.get(dst_sw)
+    if src is None or dst is None:
+        return None
+    # queue holds node ids only; the path is rebuilt from predecessors once dst is reached
+    pred = [-1] * len(dpids)
+    pred[src] = src
+    q = deque([src])
     while q:
-        path = q.popleft()
-        node = path[-1]
-        for (nbr, _, _) in graph.get(node, []):
-            if nbr in visited:
+        node = q.popleft()
+        for nbr in neighbors[offsets[node]:offsets[node + 1]]:
+            if pred[nbr] != -1:
                 continue
-            visited.add(nbr)
-            newpath = list(path) + [nbr]
-            if nbr == dst_sw:
-                return newpath
-            q.append(newpath)
+            pred[nbr] = node
+            if nbr == dst:
+                path = [dst]
+                while path[-1] != src:
+                    path.append(pred[path[-1]])
+                return [dpids[i] for i in reversed(path)]
+            q.append(nbr)
     return None
 
 
-def path_ports_for_switches(graph, switch_path):
+def graph_signature(links):
+    """Return a stable hash of the normalized topology links, used to key the on-disk path cache."""
+    entries = sorted(json.dumps([l['src'], l['src_port'], l['dst'], l['dst_port']]) for l in links)
+    return hashlib.blake2b('\n'.join(entries).encode()).hexdigest()
+
+
+def load_path_cache(graph_sig):
+    """
+    Populate PATH_CACHE from ~/.cache/lightpath/<graph_sig>.json (if present) and register an
+    atexit hook that writes it back, so repeated runs on the same topology skip the BFS.
+    """
+    cache_file = os.path.join(PATH_CACHE_DIR, graph_sig + '.json')
+    try:
+        with open(cache_file) as f:
+            # stored as [src_sw, dst_sw, path] triples since JSON objects cannot have tuple keys
+            for src_sw, dst_sw, path in json.load(f):
+                PATH_CACHE[(src_sw, dst_sw)] = path
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print("DEBUG: ignoring unreadable path cache {}: {}".format(cache_file, e))
+    atexit.register(save_path_cache, cache_file, len(PATH_CACHE))
+
+
+def save_path_cache(cache_file, loaded_entries=0):
+    """Write PATH_CACHE to cache_file atomically, unless nothing was added since it was loaded."""
+    if len(PATH_CACHE) == loaded_entries:
+        return
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp = cache_file + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump([[src_sw, dst_sw, path] for (src_sw, dst_sw), path in PATH_CACHE.items()], f)
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        print("DEBUG: could not write path cache {}: {}".format(cache_file, e))
+
+
+def cached_shortest_switch_path(graph, src_sw, dst_sw):
+    """
+    shortest_switch_path memoized in PATH_CACHE, including negative (None) results.
+    The CSR adjacency is only built from graph on a cache miss.
+    """
+    key = (src_sw, dst_sw)
+    if key not in PATH_CACHE:
+        PATH_CACHE[key] = shortest_switch_path(build_csr(graph), src_sw, dst_sw)
+    return PATH_CACHE[key]
+
+
+def path_ports_for_switches(port_of, switch_path):
     """
     For a switch path [s1, s2, s3], compute for each hop the (in_port, out_port) on the switch.
     in_port = port on this switch to previous hop (or None)
@@ -222,27 +338,14 @@ def path_ports_for_switches(graph, switch_path):
     """
     hop_ports = {}
     for i, sw in enumerate(switch_path):
-        in_port = None
-        out_port = None
-        if i > 0:
-            prev = switch_path[i - 1]
-            for nbr, src_p, dst_p in graph.get(sw, []):
-                if nbr == prev:
-                    in_port = src_p
-                    break
-        if i < len(switch_path) - 1:
-            nxt = switch_path[i + 1]
-            for nbr, src_p, dst_p in graph.get(sw, []):
-                if nbr == nxt:
-                    out_port = src_p
-                    break
+        in_port = port_of.get((sw, switch_path[i - 1])) if i > 0 else None
+        out_port = port_of.get((sw, switch_path[i + 1])) if i < len(switch_path) - 1 else None
         hop_ports[sw] = (in_port, out_port)
     return hop_ports
 
 
-def push_flow(floodlight_url, switch_dpid, flow_name, in_port, out_port, priority=32768):
-    """Push a single static flow to Floodlight using staticflowpusher API."""
-    url = floodlight_url.rstrip('/') + '/wm/staticflowpusher/json'
+def build_flow(switch_dpid, flow_name, in_port, out_port, priority=32768):
+    """Return a staticflowpusher entry forwarding in_port (any port if None) to out_port."""
     flow = {
         "switch": switch_dpid,
         "name": flow_name,
@@ -253,10 +356,29 @@ def push_flow(floodlight_url, switch_dpid, flow_name, in_port, out_port, priorit
     if in_port is not None:
         flow["in_port"] = str(in_port)
     flow["actions"] = "output={}".format(out_port)
-    r = requests.post(url, data=json.dumps(flow), headers=HEADERS)
+    return flow
+
+
+def push_flow(floodlight_url, flow, session=None):
+    """Push a flow entry, or a list of entries in one request, using staticflowpusher API."""
+    url = floodlight_url.rstrip('/') + '/wm/staticflowpusher/json'
+    r = (session or requests).post(url, data=json.dumps(flow), headers=HEADERS)
     return r
 
 
+def flow_pushed(r):
+    """
+    Return True if a staticflowpusher response reports success. Some Floodlight versions answer
+    a rejected entry with HTTP 200, so the parsed status message is checked as well.
+    """
+    if not r.ok:
+        return False
+    try:
+        return r.json().get('status') == 'Entry pushed'
+    except (ValueError, AttributeError):
+        return False
+
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument('--src', required=True, help='source host (e.g. h1)')
@@ -264,16 +386,25 @@ def main():
     p.add_argument('--floodlight', default='http://127.0.0.1:8080',
                    help='Floodlight base URL (default http://127.0.0.1:8080)')
     p.add_argument('--bidirectional', action='store_true', help='install flows for both directions')
+    p.add_argument('--batch', action='store_true',
+                   help='try installing all flows with one POST first (needs a controller that accepts a list body)')
     args = p.parse_args()
 
     fl = args.floodlight.rstrip('/')
+    session = make_session()
     print("Using Floodlight URL:", fl)
-    print("Discovering devices from Floodlight... (ensure hosts have been learned: run ping in Mininet if needed)")
-    devices = get_devices(fl)
+    print("Discovering devices and topology from Floodlight... (ensure hosts have been learned: run ping in Mininet if needed)")
+    # The discovery GETs are independent, so overlap their round trips on the shared session
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        f_devices = executor.submit(get_devices, fl, session)
+        f_links = executor.submit(get_topology_links, fl, session)
+        devices = f_devices.result()
+        links = f_links.result()
     print("Device count from Floodlight:", len(devices))
 
-    src_dev = find_device_by_name(devices, args.src)
-    dst_dev = find_device_by_name(devices, args.dst)
+    device_index = index_devices(devices)
+    src_dev = find_device_by_name(device_index, args.src)
+    dst_dev = find_device_by_name(device_index, args.dst)
 
     # If automatic find failed, try to search by heuristics (attachmentPoint presence)
     def pick_attachment(dev, host_label):
@@ -322,16 +453,16 @@ def main():
     print(f"Source {args.src} -> switch {src_switch}, port {src_port}")
     print(f"Dest   {args.dst} -> switch {dst_switch}, port {dst_port}")
 
-    # Get topology links and build graph
-    links = get_topology_links(fl)
+    # Build graph from the topology links fetched above
     print("Topology links retrieved:", len(links))
     if len(links) == 0:
         print("ERROR: topology API returned 0 usable link entries. Please check Floodlight topology output:")
-        raw_check = requests.get(fl + '/wm/topology/links/json').text
+        raw_check = session.get(fl + '/wm/topology/links/json').text
         print(raw_check)
         raise SystemExit("Exiting due to empty topology links.")
 
-    graph = build_switch_graph(links)
+    graph, port_of = build_switch_graph(links)
+    load_path_cache(graph_signature(links))
     # Debug: print graph keys
     print("Graph switch nodes:", list(graph.keys()))
 
@@ -341,7 +472,7 @@ def main():
     if dst_switch not in graph and src_switch != dst_switch:
         print("Warning: dest switch not in topology graph; topology may be named differently.")
 
-    sw_path = shortest_switch_path(graph, src_switch, dst_switch)
+    sw_path = cached_shortest_switch_path(graph, src_switch, dst_switch)
     if sw_path is None:
         if src_switch == dst_switch:
             sw_path = [src_switch]
@@ -351,7 +482,7 @@ def main():
     print("Switch path (dpids):", " -> ".join(sw_path))
 
     # compute hop ports
-    hop_ports = path_ports_for_switches(graph, sw_path)
+    hop_ports = path_ports_for_switches(port_of, sw_path)
     # For first switch, set in_port = src_port (host), for last switch out_port = dst_port (host)
     hop_ports[sw_path[0]] = (src_port, hop_ports[sw_path[0]][1])
     hop_ports[sw_path[-1]] = (hop_ports[sw_path[-1]][0], dst_port)
@@ -360,21 +491,21 @@ def main():
     for sw in sw_path:
         print(f"  {sw}: {hop_ports[sw]}")
 
-    # Push flows in the forward direction
-    print("\nPushing forward-direction flows...")
+    # Collect flows for the forward direction
+    flows = []
+    print("\nForward-direction flows:")
     for i, sw in enumerate(sw_path):
         in_p, out_p = hop_ports[sw]
         if out_p is None:
             out_p = dst_port
         name = f"fwd_{args.src}_to_{args.dst}_{i+1}"
-        print(f"Pushing flow to {sw}: in_port={in_p}, out={out_p}, name={name}")
-        r = push_flow(fl, sw, name, in_p, out_p)
-        print("  Response:", r.status_code, r.text)
+        print(f"  {sw}: in_port={in_p}, out={out_p}, name={name}")
+        flows.append(build_flow(sw, name, in_p, out_p))
 
     if args.bidirectional:
-        print("\nPushing reverse-direction flows...")
+        print("\nReverse-direction flows:")
         rev_path = list(reversed(sw_path))
-        rev_hop_ports = path_ports_for_switches(graph, rev_path)
+        rev_hop_ports = path_ports_for_switches(port_of, rev_path)
         rev_hop_ports[rev_path[0]] = (dst_port, rev_hop_ports[rev_path[0]][1])
         rev_hop_ports[rev_path[-1]] = (rev_hop_ports[rev_path[-1]][0], src_port)
         for i, sw in enumerate(rev_path):
@@ -382,9 +513,29 @@ def main():
             if out_p is None:
                 out_p = src_port
             name = f"rev_{args.dst}_to_{args.src}_{i+1}"
-            print(f"Pushing flow to {sw}: in_port={in_p}, out={out_p}, name={name}")
-            r = push_flow(fl, sw, name, in_p, out_p)
-            print("  Response:", r.status_code, r.text)
+            print(f"  {sw}: in_port={in_p}, out={out_p}, name={name}")
+            flows.append(build_flow(sw, name, in_p, out_p))
+
+    pending = flows
+    if args.batch:
+        # Install every flow with a single POST; controllers that reject a list body get one POST per flow
+        print(f"\nPushing {len(flows)} flows in one batch...")
+        r = push_flow(fl, flows, session=session)
+        print("  Response:", r.status_code, r.text)
+        if flow_pushed(r):
+            pending = []
+        else:
+            # Entries are keyed by name, so re-pushing any the batch did install is harmless
+            print("Batch rejected; pushing flows individually...")
+
+    if pending:
+        # Push concurrently so controller round trips overlap instead of adding up per hop
+        print(f"\nPushing {len(pending)} flows...")
+        with ThreadPoolExecutor(max_workers=min(MAX_PUSH_WORKERS, len(pending))) as executor:
+            futures = {executor.submit(push_flow, fl, flow, session=session): flow["name"] for flow in pending}
+            for future in as_completed(futures):
+                r = future.result()
+                print(f"  {futures[future]} response:", r.status_code, r.text)
 
     print("\nDone. You can verify via Floodlight API or in Mininet: `dpctl dump-flows` for each switch or")
     print(f"GET {fl}/wm/core/switch/all/flow/json to list flows per switch on Floodlight.")
@@ -1,22 +1,24 @@
+from itertools import combinations, product
+
 from mininet.topo import Topo
 
 class Meshtopology(Topo):
     def build(self):
+        # Bind the Topo methods once instead of looking them up for every node and link
+        addSwitch = self.addSwitch
+        addHost = self.addHost
+        addLink = self.addLink
 
         # Adding switches
-        switches = [self.addSwitch(f"s{k+1}") for k in range(6)]
+        switches = [addSwitch(f"s{k+1}") for k in range(6)]
 
         # Adding hosts and connecting to switches
-        for k, switch in enumerate(switches):
-            for n in range(20):
-                host_id = k * 20 + n + 1
-                host = self.addHost(f"h{host_id}")
-                self.addLink(host, switch)
+        for k, n in product(range(6), range(20)):
+            addLink(addHost(f"h{k * 20 + n + 1}"), switches[k])
 
         # Fully connecting all switches to each other (full meshing)
-        for k in range(len(switches)):
-            for n in range(k + 1, len(switches)):
-                self.addLink(switches[k], switches[n])
+        for k, n in combinations(range(6), 2):
+            addLink(switches[k], switches[n])
 
 topos = {"custom": Meshtopology}
 
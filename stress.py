@@ -1,9 +1,12 @@
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import aiohttp
+import asyncio
 import time
+from urllib.parse import urlencode
 
 # Target endpoint and data
-url = "http://localhost:9091/get-address"
+HOST = "127.0.0.1"
+PORT = 9091
+url = f"http://{HOST}:{PORT}/get-address"
 headers = {
     "Content-Type": "application/x-www-form-urlencoded"
 }
@@ -11,35 +14,47 @@ payload = {
     "lat": "6.6500",
     "long": "-1.647"
 }
+BODY = urlencode(payload).encode()  # encoded once, posted as raw bytes
 
 # Number of requests and concurrency level
 total_requests = 1000  # total number of requests to send
-max_workers = 50       # number of concurrent threads
-
-def send_request():
-    try:
-        response = requests.post(url, headers=headers, data=payload, timeout=5)
-        return response.status_code
-    except requests.RequestException as e:
-        return f"Error: {e}"
-
-def stress_test():
-    start_time = time.time()
-    results = []
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(send_request) for _ in range(total_requests)]
-
-        for future in as_completed(futures):
-            results.append(future.result())
-
-    end_time = time.time()
+max_workers = 50       # number of requests in flight at once
+
+async def send_request(session, sem):
+    async with sem:
+        try:
+            async with session.post(url, data=BODY,
+                                    timeout=aiohttp.ClientTimeout(total=5)) as response:
+                # Status only: skip an already-buffered body, drain a partial one to keep the socket
+                if not response.content.is_eof():
+                    await response.read()
+                return response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return f"Error: {e}"
+
+async def stress_test():
+    # One event loop multiplexes every in-flight request over pooled keep-alive sockets
+    sem = asyncio.Semaphore(max_workers)
+    connector = aiohttp.TCPConnector(limit=max_workers, limit_per_host=max_workers, keepalive_timeout=30, ttl_dns_cache=None)
+    async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+        # Warm-up: open the pooled connections before timing so setup cost is not measured
+        await asyncio.gather(*(send_request(session, sem) for _ in range(max_workers)))
+
+        start_time = time.perf_counter()
+        tasks = [asyncio.create_task(send_request(session, sem)) for _ in range(total_requests)]
+        # Count successes as requests complete instead of keeping every result for later passes
+        success_count = 0
+        for task in asyncio.as_completed(tasks):
+            if await task == 200:
+                success_count += 1
+        end_time = time.perf_counter()
 
     # Summary
     print(f"Total requests sent: {total_requests}")
-    print(f"Successful requests: {sum(1 for r in results if r == 200)}")
-    print(f"Failed requests: {sum(1 for r in results if r != 200)}")
+    print(f"Successful requests: {success_count}")
+    print(f"Failed requests: {total_requests - success_count}")
     print(f"Time taken: {end_time - start_time:.2f} seconds")
+    print(f"Requests per second: {total_requests / (end_time - start_time):.2f}")
 
 if __name__ == "__main__":
-    stress_test()
+    asyncio.run(stress_test())
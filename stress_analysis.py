@@ -1,62 +1,131 @@
-import requests
+import aiohttp
+import asyncio
 import csv
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import urlencode
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 
 # Target endpoint
-url = "http://localhost:9091/get-address"
+HOST = "127.0.0.1"
+PORT = 9091
+url = f"http://{HOST}:{PORT}/get-address"
 headers = {
     "Content-Type": "application/x-www-form-urlencoded"
 }
 
-def send_request(request_id, lat, longi):
-    """Send a single request and log the response time and status."""
-    payload = {"lat": lat, "long": longi}
-    start_time = time.time()
+# Past a few hundred sockets on one host the kernel starts dropping connections and
+# throughput plateaus, so concurrency is capped here
+# Each script runs standalone, so this block is duplicated on purpose; keep it identical
+# to the copy in stress_load.py
+MAX_CONCURRENT_USERS = 512
+
+def limit_concurrency(concurrent_users):
+    """Clamp concurrent_users to MAX_CONCURRENT_USERS and make sure that many sockets can be opened."""
+    if concurrent_users < 1:
+        raise ValueError("concurrent_users must be greater than 0")
+    if concurrent_users > MAX_CONCURRENT_USERS:
+        print(f"Warning: capping concurrent users at {MAX_CONCURRENT_USERS} (requested {concurrent_users})")
+        concurrent_users = MAX_CONCURRENT_USERS
+    # Lift the soft open-file limit to the hard limit
+    if resource is not None:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < hard:
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+            except (ValueError, OSError):
+                pass
+    return concurrent_users
+
+async def send_request(session, request_id, lat, longi, body):
+    """
+    Send a single request and return (request_id, start, end, lat, longi, status).
+    start/end are raw perf_counter() readings and status is the HTTP status code or an
+    error message; all formatting is left to the CSV writer, outside the timed path.
+    body is the pre-encoded form payload for lat/longi.
+    """
+    start = time.perf_counter()
     try:
-        response = requests.post(url, headers=headers, data=payload, timeout=5)
-        response_time = round(time.time() - start_time, 4)
-        status = "Success" if response.status_code == 200 else f"Failed ({response.status_code})"
-    except requests.RequestException as e:
-        response_time = round(time.time() - start_time, 4)
+        async with session.post(url, data=body,
+                                timeout=aiohttp.ClientTimeout(total=5)) as response:
+            # Status only: skip an already-buffered body, drain a partial one to keep the socket
+            if not response.content.is_eof():
+                await response.read()
+        status = response.status
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         status = f"Error: {str(e)}"
+    end = time.perf_counter()
 
-    return [
-        request_id,
-        time.strftime("%Y-%m-%d %H:%M:%S"),
-        lat,
-        longi,
-        response_time,
-        status
-    ]
-
-def stress_test(total_requests, concurrent_users, lat, longi):
-    start_time = time.time()
-    results = []
-
-    # Send concurrent requests
-    with ThreadPoolExecutor(max_workers=concurrent_users) as executor:
-        futures = [executor.submit(send_request, i + 1, lat, longi) for i in range(total_requests)]
-        for future in as_completed(futures):
-            results.append(future.result())
-
-    # Save results to CSV
-    filename = f"stress_test_results_{int(time.time())}.csv"
-    with open(filename, "w", newline="") as f:
+    return (request_id, start, end, lat, longi, status)
+
+async def worker(session, request_ids, results, lat, longi, body):
+    """Send requests for ids pulled from the shared iterator, then signal completion with None."""
+    try:
+        for request_id in request_ids:
+            await results.put(await send_request(session, request_id, lat, longi, body))
+    finally:
+        await results.put(None)
+
+async def stress_test(total_requests, concurrent_users, lat, longi):
+    concurrent_users = limit_concurrency(concurrent_users)
+    # Wall-clock anchor for turning perf_counter() readings into CSV timestamps
+    t0_wall = time.time()
+    t0_perf = time.perf_counter()
+
+    # Open the CSV up front and stream rows into it as requests complete;
+    # a 1 MiB buffer coalesces the per-row writes into few syscalls
+    filename = f"stress_test_results_{int(t0_wall)}.csv"
+    with open(filename, "w", newline="", buffering=1 << 20) as f:
         writer = csv.writer(f)
         writer.writerow(["Request ID", "Timestamp", "Latitude", "Longitude", "Response Time (s)", "Status"])
-        writer.writerows(results)
+
+        # Running statistics, so no per-request results are kept in memory
+        success_count = 0
+        total_time = 0.0
+        min_time = float("inf")
+        max_time = 0.0
+
+        # One worker per concurrent user pulls request ids and hands results back through a
+        # bounded queue, so memory stays O(concurrent_users) rather than one task per request
+        connector = aiohttp.TCPConnector(limit=concurrent_users, limit_per_host=concurrent_users, keepalive_timeout=30, ttl_dns_cache=None)
+        # Every request carries the same coordinates, so encode the form body once
+        body = urlencode({"lat": lat, "long": longi}).encode()
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+            request_ids = iter(range(1, total_requests + 1))
+            results = asyncio.Queue(maxsize=concurrent_users)
+            workers = [asyncio.create_task(worker(session, request_ids, results, lat, longi, body))
+                       for _ in range(concurrent_users)]
+            running = len(workers)
+            while running:
+                result = await results.get()
+                if result is None:
+                    running -= 1
+                    continue
+                request_id, start, end, row_lat, row_longi, status = result
+                response_time = end - start
+                total_time += response_time
+                min_time = min(min_time, response_time)
+                max_time = max(max_time, response_time)
+                if status == 200:
+                    success_count += 1
+                    status = "Success"
+                elif isinstance(status, int):
+                    status = f"Failed ({status})"
+                timestamp = datetime.fromtimestamp(t0_wall + (start - t0_perf)).strftime("%Y-%m-%d %H:%M:%S")
+                writer.writerow([request_id, timestamp, row_lat, row_longi, f"{response_time:.4f}", status])
+            # Surface any unexpected worker failure
+            await asyncio.gather(*workers)
 
         # Summary statistics
         writer.writerow([])  # Empty row
         writer.writerow(["--- Summary Statistics ---"])
-        response_times = [r[4] for r in results]
-        success_count = sum(1 for r in results if "Success" in r[5])
         fail_count = total_requests - success_count
-        avg_time = sum(response_times) / len(response_times)
-        min_time = min(response_times)
-        max_time = max(response_times)
-        total_duration = time.time() - start_time
+        avg_time = total_time / total_requests
+        total_duration = time.perf_counter() - t0_perf
         requests_per_sec = round(total_requests / total_duration, 2)
 
         writer.writerow(["Total Requests", total_requests])
@@ -64,8 +133,8 @@ def stress_test(total_requests, concurrent_users, lat, longi):
         writer.writerow(["Successful Requests", success_count])
         writer.writerow(["Failed Requests", fail_count])
         writer.writerow(["Average Response Time (s)", round(avg_time, 4)])
-        writer.writerow(["Fastest Response Time (s)", min_time])
-        writer.writerow(["Slowest Response Time (s)", max_time])
+        writer.writerow(["Fastest Response Time (s)", round(min_time, 4)])
+        writer.writerow(["Slowest Response Time (s)", round(max_time, 4)])
         writer.writerow(["Total Duration (s)", round(total_duration, 2)])
         writer.writerow(["Requests Per Second (RPS)", requests_per_sec])
         writer.writerow(["Latency (s)", round(avg_time, 4)])  # Using avg_time as latency here
@@ -90,4 +159,4 @@ if __name__ == "__main__":
     lat = 6.6500
     longi = -1.647
 
-    stress_test(total_requests, concurrent_users, lat, longi)
+    asyncio.run(stress_test(total_requests, concurrent_users, lat, longi))
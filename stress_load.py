@@ -1,10 +1,21 @@
-import requests
-import csv
+import aiohttp
+import asyncio
+import os
+import queue
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import urlencode
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 
 # Target endpoint
-url = "http://localhost:9091/get-address"
+HOST = "127.0.0.1"
+PORT = 9091
+url = f"http://{HOST}:{PORT}/get-address"
 headers = {
     "Content-Type": "application/x-www-form-urlencoded"
 }
@@ -13,53 +24,186 @@ payload = {
     "long": "-1.647"
 }
 
-def send_request(request_id):
-    """Send a single request and log the response time and status."""
-    start_time = time.time()
+# Per-request constants, built once instead of on every send_request call
+BODY = urlencode(payload).encode()
+LAT_B = payload["lat"].encode()
+LNG_B = payload["long"].encode()
+TIMEOUT = aiohttp.ClientTimeout(total=5)
+
+# Fixed CSV schema: every field is numeric, a timestamp or a comma-free status,
+# so rows are formatted directly as ASCII bytes instead of going through csv.writer
+# quoting and a text-mode encoder
+CSV_HEADER = b"Request ID,Timestamp,Latitude,Longitude,Response Time (s),Status\n"
+CSV_TEMPLATE = b"%d,%s,%s,%s,%.4f,%s\n"
+CSV_FLUSH_BYTES = 128 * 1024  # buffered row bytes handed to a single os.write()
+
+# Past a few hundred sockets on one host the kernel starts dropping connections and
+# throughput plateaus, so concurrency is capped here
+# Each script runs standalone, so this block is duplicated on purpose; keep it identical
+# to the copy in stress_analysis.py
+MAX_CONCURRENT_USERS = 512
+
+def limit_concurrency(concurrent_users):
+    """Clamp concurrent_users to MAX_CONCURRENT_USERS and make sure that many sockets can be opened."""
+    if concurrent_users < 1:
+        raise ValueError("concurrent_users must be greater than 0")
+    if concurrent_users > MAX_CONCURRENT_USERS:
+        print(f"Warning: capping concurrent users at {MAX_CONCURRENT_USERS} (requested {concurrent_users})")
+        concurrent_users = MAX_CONCURRENT_USERS
+    # Lift the soft open-file limit to the hard limit
+    if resource is not None:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < hard:
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+            except (ValueError, OSError):
+                pass
+    return concurrent_users
+
+async def send_request(session, request_id, _url=url, _body=BODY, _timeout=TIMEOUT, _lat=LAT_B, _lng=LNG_B,
+                       _perf=time.perf_counter, _time=time.time, _fromtimestamp=datetime.fromtimestamp,
+                       _errors=(aiohttp.ClientError, asyncio.TimeoutError)):
+    """
+    Send a single request and log the response time and status.
+    The response time is reported in whole microseconds; status is the integer HTTP status
+    code, or an error message if the request failed.
+    The underscore defaults pre-bind module globals as fast locals for this hot path; callers
+    never pass them.
+    """
+    start_time = _perf()
+    started_at = _time()  # wall clock, only for the Timestamp column
     try:
-        response = requests.post(url, headers=headers, data=payload, timeout=5)
-        response_time = round(time.time() - start_time, 4)
-        status = "Success" if response.status_code == 200 else f"Failed ({response.status_code})"
-    except requests.RequestException as e:
-        response_time = round(time.time() - start_time, 4)
-        status = f"Error: {str(e)}"
+        async with session.post(_url, data=_body, timeout=_timeout) as response:
+            # Only the status is used. A small body is already buffered with the headers and
+            # is discarded on release; a body still in flight is drained so the socket stays reusable
+            if not response.content.is_eof():
+                await response.read()
+        elapsed_us = int((_perf() - start_time) * 1_000_000)
+        status = response.status
+    except _errors as e:
+        elapsed_us = int((_perf() - start_time) * 1_000_000)
+        status = f"Error: {str(e)}".replace(",", ";")
 
     return [
         request_id,
-        time.strftime("%Y-%m-%d %H:%M:%S"),
-        payload["lat"],
-        payload["long"],
-        response_time,
+        _fromtimestamp(started_at).isoformat(" ", "seconds"),
+        _lat,
+        _lng,
+        elapsed_us,
         status
     ]
 
-def stress_test(total_requests, concurrent_users):
-    start_time = time.time()
-    results = []
+def write_all(fd, data):
+    """os.write() data to fd, retrying until a short write has been completed."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
 
-    # Send concurrent requests
-    with ThreadPoolExecutor(max_workers=concurrent_users) as executor:
-        futures = [executor.submit(send_request, i + 1) for i in range(total_requests)]
-        for future in as_completed(futures):
-            results.append(future.result())
+def drain_rows(rows, fd, errors):
+    """
+    Writer thread: buffer encoded rows from the queue and flush them to fd until None arrives.
+    A failed write is appended to errors and ends the thread; stress_test re-raises it.
+    """
+    try:
+        buf = bytearray()
+        while True:
+            row = rows.get()
+            if row is None:
+                break
+            buf += row
+            if len(buf) >= CSV_FLUSH_BYTES:
+                write_all(fd, buf)
+                del buf[:]
+        write_all(fd, buf)
+        os.fsync(fd)
+    except BaseException as e:
+        errors.append(e)
 
-    # Save results to CSV
+async def worker(session, request_ids, results):
+    """Send requests for ids pulled from the shared iterator, then signal completion with None."""
+    try:
+        for request_id in request_ids:
+            await results.put(await send_request(session, request_id))
+    finally:
+        await results.put(None)
+
+async def stress_test(total_requests, concurrent_users):
+    concurrent_users = limit_concurrency(concurrent_users)
+    start_time = time.perf_counter()
+
+    # Open the CSV up front and stream rows into it as requests complete. A dedicated
+    # writer thread batches them in a bytearray and writes to the raw descriptor every
+    # CSV_FLUSH_BYTES, so disk latency never stalls the event loop sending requests
     filename = f"stress_test_results_{int(time.time())}.csv"
-    with open(filename, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["Request ID", "Timestamp", "Latitude", "Longitude", "Response Time (s)", "Status"])
-        writer.writerows(results)
-
-    # Calculate summary statistics
-    response_times = [r[4] for r in results]
-    success_count = sum(1 for r in results if "Success" in r[5])
+    fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    rows = queue.SimpleQueue()
+    writer_errors = []
+    writer_thread = threading.Thread(target=drain_rows, args=(rows, fd, writer_errors))
+    writer_thread.start()
+    try:
+        rows.put(CSV_HEADER)
+
+        # Running statistics, so no per-request results are kept in memory; times are
+        # integer microseconds so the sums stay exact and are only scaled for reporting
+        success_count = 0
+        total_us = 0
+        min_us = float("inf")
+        max_us = 0
+
+        # One worker per concurrent user pulls request ids and hands rows back through a
+        # bounded queue, so memory stays O(concurrent_users) rather than one task per request
+        # ttl_dns_cache=None keeps the first lookup of HOST for the whole run, so new
+        # connections skip getaddrinfo without resolving anything at import time
+        connector = aiohttp.TCPConnector(limit=concurrent_users, limit_per_host=concurrent_users, keepalive_timeout=30, ttl_dns_cache=None)
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+            request_ids = iter(range(1, total_requests + 1))
+            results = asyncio.Queue(maxsize=concurrent_users)
+            workers = [asyncio.create_task(worker(session, request_ids, results)) for _ in range(concurrent_users)]
+            running = len(workers)
+            while running:
+                row = await results.get()
+                if row is None:
+                    running -= 1
+                    continue
+                request_id, timestamp, lat, lng, elapsed_us, status = row
+                if status == 200:
+                    success_count += 1
+                    status_text = b"Success"
+                elif isinstance(status, int):
+                    status_text = b"Failed (%d)" % status
+                else:
+                    status_text = status.encode()
+                if writer_errors:
+                    break
+                rows.put(CSV_TEMPLATE % (request_id, timestamp.encode(), lat, lng, elapsed_us / 1e6, status_text))
+                total_us += elapsed_us
+                min_us = min(min_us, elapsed_us)
+                max_us = max(max_us, elapsed_us)
+            if writer_errors:
+                # The writer thread died, so stop sending instead of queueing rows nobody will
+                # write. Emptying the queue leaves room for each cancelled worker's closing None
+                for task in workers:
+                    task.cancel()
+                while not results.empty():
+                    results.get_nowait()
+                await asyncio.gather(*workers, return_exceptions=True)
+            else:
+                # Surface any unexpected worker failure
+                await asyncio.gather(*workers)
+    finally:
+        rows.put(None)
+        writer_thread.join()
+        os.close(fd)
+    if writer_errors:
+        raise writer_errors[0]
+
     fail_count = total_requests - success_count
-    avg_time = sum(response_times) / len(response_times)
-    min_time = min(response_times)
-    max_time = max(response_times)
+    avg_time = total_us / total_requests / 1e6
+    min_time = min_us / 1e6
+    max_time = max_us / 1e6
 
     # Print summary
-    end_time = time.time()
+    end_time = time.perf_counter()
     print("\n--- Load Test Summary ---")
     print(f"Total Users (Concurrent): {concurrent_users}")
     print(f"Total Requests: {total_requests}")
@@ -76,4 +220,4 @@ if __name__ == "__main__":
     total_requests = int(input("Enter total number of requests to send: "))
     concurrent_users = int(input("Enter number of concurrent users: "))
 
-    stress_test(total_requests, concurrent_users)
+    asyncio.run(stress_test(total_requests, concurrent_users))